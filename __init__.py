@@ -1,5 +1,7 @@
 '''ComfyUI-Tabularize: Automatic node column organization'''
 
+import os
+
 # Import api module to register routes
 from . import api  # noqa: F401
 
@@ -13,4 +15,8 @@ WEB_DIRECTORY = './web'
 
 print( '[Tabularize] Python module loaded successfully' )
 
+# aiohttp falls back to its pure-Python HTTP parser when extensions are disabled
+if os.environ.get( 'AIOHTTP_NO_EXTENSIONS' ):
+    print( '[Tabularize] Warning: AIOHTTP_NO_EXTENSIONS is set, request parsing will be slower' )
+
 __all__ = ['NODE_CLASS_MAPPINGS', 'WEB_DIRECTORY']
@@ -3,32 +3,160 @@ API route handlers for ComfyUI-Tabularize
 Defines HTTP endpoints for JavaScript-Python communication
 '''
 
+import asyncio
+import hashlib
+import os
+import sys
+from collections import OrderedDict
+import traceback
+from json import JSONDecodeError  # orjson.JSONDecodeError subclasses this
+
 from aiohttp import web  # type: ignore[import-not-found]
 import server  # type: ignore[import-not-found]
-from .tabularize import organize_nodes, detect_link_overlaps
-
-
-# Action dispatch table with metadata
-ACTION_HANDLERS = {
-    'log': {
-        'function': None,
-        'data_key': 'message',
-        'message': lambda d: f'[Tabularize] {d.get( "message", "" )}',
-    },
-    'organize': {
-        'function': organize_nodes,
-        'data_key': 'graph',
-        'message': lambda d: '[Tabularize] Organizing nodes...',
-    },
-    'reroute': {
-        'function': detect_link_overlaps,
-        'data_key': 'graph',
-        'message': lambda d: '[Tabularize] Detecting link overlaps...',
-    },
+
+# Layout module, imported on first organize/reroute request
+_tabularize = None
+
+
+def _get_tabularize():
+    '''Import the layout module on first use so ComfyUI startup doesn't pay for it'''
+    global _tabularize
+    if _tabularize is None:
+        from . import tabularize
+        _tabularize = tabularize
+    return _tabularize
+
+
+# Prefer orjson for (de)serializing large graph payloads, fall back to stdlib json
+try:
+    import orjson  # type: ignore[import-not-found]
+    _loads = orjson.loads
+    def _dumps( obj ):
+        # Node IDs are integer dict keys (positions/sizes)
+        return orjson.dumps( obj, option=orjson.OPT_NON_STR_KEYS )
+except ImportError:
+    import json
+    _loads = json.loads
+    def _dumps( obj ):
+        return json.dumps( obj ).encode( 'utf-8' )
+
+
+# Per-request status lines are only printed when TABULARIZE_VERBOSE=1
+VERBOSE = os.environ.get( 'TABULARIZE_VERBOSE' ) == '1'
+
+# Graphs with more nodes than this are processed off the event loop
+EXECUTOR_NODE_THRESHOLD = 50
+
+# Results larger than this are compressed if the client accepts it
+COMPRESS_MIN_BYTES = 4096
+
+# Number of recent organize/reroute responses kept, keyed by request body hash
+RESULT_CACHE_SIZE = 16
+_result_cache = OrderedDict()  # body digest -> encoded response body
+
+# Largest accepted request body (graph payloads), in bytes
+MAX_BODY = 64 * 1024 * 1024
+READ_CHUNK_SIZE = 65536
+
+
+async def _read_body( request ):
+    '''
+    Read the request body into a single buffer.
+    
+    When Content-Length is known the buffer is allocated once at full size
+    and filled in place; otherwise it grows as chunks arrive.
+    
+    Returns:
+        bytearray with the raw body, or None if it exceeds MAX_BODY
+    '''
+    size = request.content_length
+    if size is None:
+        buf = bytearray()
+        async for chunk in request.content.iter_chunked( READ_CHUNK_SIZE ):
+            buf += chunk
+            if len( buf ) > MAX_BODY:
+                return None
+        return buf
+    
+    if size > MAX_BODY:
+        return None
+    
+    buf    = bytearray( size )
+    view   = memoryview( buf )
+    offset = 0
+    async for chunk in request.content.iter_chunked( READ_CHUNK_SIZE ):
+        end = offset + len( chunk )
+        if end > size:
+            return None
+        view[offset:end] = chunk
+        offset = end
+    view.release()
+    
+    # Body ended early - drop the unfilled tail
+    if offset < size:
+        del buf[offset:]
+    return buf
+
+
+def _write( line ):
+    '''Write a single status line to stdout'''
+    # Resolve sys.stdout per call - ComfyUI may redirect it for its log viewer
+    sys.stdout.write( line + '\n' )
+
+
+def _raw( body, status=200 ):
+    '''Build a JSON response from an already-encoded body'''
+    return web.Response( body=body, status=status, content_type='application/json' )
+
+
+def _result_response( body ):
+    '''Build the response for an organize/reroute result body'''
+    response = _raw( body )
+    if len( body ) > COMPRESS_MIN_BYTES:
+        # Negotiated against Accept-Encoding (gzip/deflate) when the response is sent
+        response.enable_compression()
+    return response
+
+
+def _unknown_action( action ):
+    '''Build the 400 response for an unrecognized action'''
+    # Only the message varies - encode it alone (escaped) into the fixed envelope
+    return _raw( b'{"error": ' + _dumps( f'Unknown action: {action}' ) + b'}', status=400 )
+
+
+def _json( obj, status=200 ):
+    '''Serialize obj into a JSON response'''
+    return _raw( _dumps( obj ), status )
+
+
+# Per-action status messages
+_ORGANIZE_MSG = '[Tabularize] Organizing nodes...'
+_REROUTE_MSG  = '[Tabularize] Detecting link overlaps...'
+
+# Results for graphs with nothing to process (fewer than 2 nodes or no links)
+_EMPTY_RESULTS = {
+    'organize': {'status': 'success', 'message': 'No workflow nodes to organize', 'positions': {}},
+    'reroute':  {'status': 'success', 'message': 'No links to analyze', 'overlaps': []},
 }
 
+_LOG_PREFIX = '[Tabularize] '
+
+# Pre-encoded response bodies
+_OK_BODY          = _dumps( {'status': 'success'} )
+_BAD_JSON_BODY    = b'{"error": "Invalid JSON in request body"}'
+_BAD_TYPE_BODY    = b'{"error": "Expected application/json"}'
+_BAD_PAYLOAD_BODY = b'{"error": "Expected a JSON object"}'
+
+_CACHED_MSG = '[Tabularize] Returning cached result'
+
+# Shared default payload (never mutated)
+_EMPTY = {}
+
+# Server route table, resolved once at import
+_routes = server.PromptServer.instance.routes
+
 # Tabularize API endpoint
-@server.PromptServer.instance.routes.post( '/tabularize/action' )
+@_routes.post( '/tabularize/action' )
 async def tabularize_handler( request ):
     '''
     Unified endpoint for all Tabularize actions.
@@ -41,30 +169,79 @@ async def tabularize_handler( request ):
     }
     '''
 
+    # Reject other content types before reading the body
+    if request.content_type != 'application/json':
+        return _raw( _BAD_TYPE_BODY, status=415 )
+    
     try:
-        data = await request.json()
-        action = data.get( 'action' )
+        body = await _read_body( request )
+        if body is None:
+            return _json( {'error': 'Request body too large'}, status=413 )
         
-        if action not in ACTION_HANDLERS:
-            return web.json_response(
-                {'error': f'Unknown action: {action}'},
-                status=400
-            )
+        # Identical requests (e.g. repeated clicks) reuse the previous response
+        key = hashlib.blake2b( body, digest_size=16 ).digest()
+        cached = _result_cache.get( key )
+        if cached is not None:
+            _result_cache.move_to_end( key )
+            if VERBOSE:
+                _write( _CACHED_MSG )
+            return _result_response( cached )
         
-        handler = ACTION_HANDLERS[action]
+        data = _loads( body )
+        if type( data ) is not dict:
+            return _raw( _BAD_PAYLOAD_BODY, status=400 )
+        try:
+            action = data['action']
+        except KeyError:
+            return _unknown_action( None )
         
-        # Print message
-        print( handler['message']( data ) )
+        match action:
+            case 'log':
+                # Most frequent action - write the pieces straight out, no formatting
+                message = data.get( 'message', '' )
+                out = sys.stdout
+                out.write( _LOG_PREFIX )
+                out.write( message if type( message ) is str else str( message ) )
+                out.write( '\n' )
+                return _raw( _OK_BODY )
+            case 'organize':
+                if VERBOSE:
+                    _write( _ORGANIZE_MSG )
+                fn = _get_tabularize().organize_nodes
+            case 'reroute':
+                if VERBOSE:
+                    _write( _REROUTE_MSG )
+                fn = _get_tabularize().detect_link_overlaps
+            case _:
+                return _unknown_action( action )
         
-        # Execute function if specified
-        if handler['function']:
-            result = handler['function']( data.get( handler['data_key'], {} ) )
-            return web.json_response( result )
+        graph = data.get( 'graph' ) or _EMPTY
         
-        return web.json_response( {'status': 'success'} )
+        # Trivial graphs have a known answer - skip the layout code entirely
+        nodes = graph.get( 'nodes' ) if isinstance( graph, dict ) else None
+        if not nodes or len( nodes ) < 2 or not graph.get( 'links' ):
+            return _json( _EMPTY_RESULTS[action] )
+        
+        if len( nodes ) > EXECUTOR_NODE_THRESHOLD:
+            # Keep ComfyUI's event loop (progress websockets etc.) responsive during large layouts
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor( None, fn, graph )
+        else:
+            result = fn( graph )
+        
+        result_body = _dumps( result )
+        
+        _result_cache[key] = result_body
+        if len( _result_cache ) > RESULT_CACHE_SIZE:
+            _result_cache.popitem( last=False )
+        
+        return _result_response( result_body )
+    
+    except JSONDecodeError:
+        # Client error - no traceback needed
+        return _raw( _BAD_JSON_BODY, status=400 )
     
     except Exception as e:
         print( f'[Tabularize] Error: {e}' )
-        import traceback
         traceback.print_exc()
-        return web.json_response( {'error': str(e)}, status=500 )
\ No newline at end of file
+        return _json( {'error': str(e)}, status=500 )
\ No newline at end of file
@@ -3,6 +3,9 @@ Tabularize - Node organization logic
 All graph processing happens here in Python
 '''
 
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+
 from .utils import set_debug
 DEBUG_LEVEL = 1
 debug = set_debug( DEBUG_LEVEL )
@@ -11,6 +14,10 @@ debug = set_debug( DEBUG_LEVEL )
 NODE_TITLE_BAR_HEIGHT = 30
 GROUP_TITLE_BAR_HEIGHT = 34
 
+# Most tied longest chains enumerated before falling back to a covering set
+# (dense graphs can have exponentially many)
+MAX_LONGEST_CHAINS = 1000
+
 
 def get_node_bounds( node ):
 	'''
@@ -76,46 +83,120 @@ def line_segment_intersects_rect(
     Returns:
         True if line intersects rectangle, False otherwise
     '''
+    return bool( line_segment_intersects_rects( x1, y1, x2, y2, ((rect_x, rect_y, rect_w, rect_h),) ) )
 
-    # Check if either endpoint is inside the rectangle
-    def point_in_rect( px, py ):
-        return(
-            rect_x <= px <= rect_x + rect_w and 
-            rect_y <= py <= rect_y + rect_h
-        )
-    
-    # If either endpoint is inside the rectangle, the line intersects
-    if point_in_rect( x1, y1 ) or point_in_rect( x2, y2 ):
-        return True
 
-    def line_segments_intersect( ax1, ay1, ax2, ay2, bx1, by1, bx2, by2 ):
-        '''Check if two line segments intersect'''
-        def ccw( ax, ay, bx, by, cx, cy ):
-            return (cy - ay) * (bx - ax) > (by - ay) * (cx - ax)
-        
-        a = ccw( ax1, ay1, bx1, by1, bx2, by2 )
-        b = ccw( ax2, ay2, bx1, by1, bx2, by2 )
-        c = ccw( ax1, ay1, ax2, ay2, bx1, by1 )
-        d = ccw( ax1, ay1, ax2, ay2, bx2, by2 )
-        
-        return a != b and c != d
-    
-    # Four edges of the rectangle
-    edges = [
-        (rect_x, rect_y, rect_x + rect_w, rect_y),                   # top
-        (rect_x + rect_w, rect_y, rect_x + rect_w, rect_y + rect_h), # right
-        (rect_x, rect_y + rect_h, rect_x + rect_w, rect_y + rect_h), # bottom
-        (rect_x, rect_y, rect_x, rect_y + rect_h)                    # left
-    ]
+def line_segment_intersects_rects( x1, y1, x2, y2, rects, indices=None ):
+    '''
+    Check a line segment against many rectangles in one pass.
+    
+    Rectangles outside the segment's bounding box are rejected before the
+    full intersection test. The endpoint and edge tests are
+    inlined into the loop, so no function is called per rectangle.
+    Rectangle sizes are assumed non-negative.
     
-    # Check if the line intersects any of the rectangle's edges
-    for edge_x1, edge_y1, edge_x2, edge_y2 in edges:
-        if line_segments_intersect(
-            x1, y1, x2, y2, edge_x1, edge_y1, edge_x2, edge_y2
+    Args:
+        x1, y1:  start point of line
+        x2, y2:  end point of line
+        rects:   sequence of (rect_x, rect_y, rect_w, rect_h) tuples
+        indices: optional ascending indices into rects to test (default: all)
+        
+    Returns:
+        List of indices into rects whose rectangle the line intersects
+    '''
+    min_x = min( x1, x2 )
+    max_x = max( x1, x2 )
+    min_y = min( y1, y2 )
+    max_y = max( y1, y2 )
+    is_horizontal = y1 == y2
+    
+    # Line direction, shared by the orientation tests against every edge
+    dx = x2 - x1
+    dy = y2 - y1
+    
+    if indices is None:
+        indices = range( len( rects ) )
+    
+    hits = []
+    for i in indices:
+        rect_x, rect_y, rect_w, rect_h = rects[i]
+        rect_right  = rect_x + rect_w
+        rect_bottom = rect_y + rect_h
+        
+        # Reject rectangles outside the line's bounding box
+        if rect_right < min_x or rect_x > max_x or rect_bottom < min_y or rect_y > max_y:
+            continue
+        
+        # A horizontal line strictly between the top and bottom edges always crosses
+        # (common case once nodes are laid out in rows); lines on an edge take the full test
+        if is_horizontal and rect_y < y1 < rect_bottom:
+            hits.append( i )
+            continue
+        
+        # If either endpoint is inside the rectangle, the line intersects
+        if (
+            (rect_x <= x1 <= rect_right and rect_y <= y1 <= rect_bottom) or
+            (rect_x <= x2 <= rect_right and rect_y <= y2 <= rect_bottom)
         ):
-            return True
+            hits.append( i )
+            continue
+        
+        # Check if the line crosses any of the rectangle's edges (CCW orientation test:
+        # segments cross when each one's endpoints lie on opposite sides of the other).
+        # The edges are axis-aligned, so which side of an edge each line endpoint is on
+        # reduces to a comparison, and the line-side test is needed only once per corner
+        top_left     = (rect_y - y1) * dx      > dy * (rect_x - x1)
+        top_right    = (rect_y - y1) * dx      > dy * (rect_right - x1)
+        bottom_left  = (rect_bottom - y1) * dx > dy * (rect_x - x1)
+        bottom_right = (rect_bottom - y1) * dx > dy * (rect_right - x1)
+        
+        if rect_w > 0 and (
+            ((y1 > rect_y) != (y2 > rect_y) and top_left != top_right) or                # top
+            ((y1 > rect_bottom) != (y2 > rect_bottom) and bottom_left != bottom_right)   # bottom
+        ):
+            hits.append( i )
+        elif rect_h > 0 and (
+            ((x1 < rect_right) != (x2 < rect_right) and top_right != bottom_right) or    # right
+            ((x1 < rect_x) != (x2 < rect_x) and top_left != bottom_left)                 # left
+        ):
+            hits.append( i )
     
-    return False
+    return hits
+
+
+def build_x_index( rects ):
+    '''
+    Build a sorted index of rectangles by left edge for horizontal range queries.
+    
+    Args:
+        rects: sequence of (rect_x, rect_y, rect_w, rect_h) tuples
+        
+    Returns:
+        Tuple of (indices sorted by rect_x, sorted rect_x values, widest rect_w)
+    '''
+    order = sorted( range( len( rects ) ), key=lambda i: rects[i][0] )
+    lefts = [rects[i][0] for i in order]
+    max_w = max( (rect[2] for rect in rects), default=0 )
+    
+    return order, lefts, max_w
+
+
+def query_x_index( x_index, min_x, max_x ):
+    '''
+    Find rectangles that may overlap the horizontal range [min_x, max_x].
+    
+    Returns a superset bounded by the widest rectangle: every returned rect
+    has rect_x <= max_x, but callers still need to check its right edge
+    against min_x.
+    
+    Returns:
+        Ascending list of rect indices
+    '''
+    order, lefts, max_w = x_index
+    lo = bisect_left( lefts, min_x - max_w )
+    hi = bisect_right( lefts, max_x )
+    
+    return sorted( order[lo:hi] )
 
 
 def build_node_graph( nodes, links):
@@ -143,54 +224,72 @@ def build_node_graph( nodes, links):
     return node_map, children, parents
 
 
-def find_all_chains( node_map, children, parents ):
+def find_disconnected_components( nodes, links ):
     '''
-    Find all chains from start nodes (no inputs) to end nodes (no outputs)
+    Find disconnected components (separate workflows) in the graph.
+    
+    Uses union-find over the links, so deep workflows can't hit the
+    recursion limit.
     
     Returns:
-        List of chains, where each chain is a list of node_ids
+        List of components, where each component is a list of node_ids
     '''
+    # Map node IDs to dense indices, in node order
+    index = {}
+    for node in nodes:
+        index.setdefault( node['id'], len( index ) )
     
-    # Find start nodes (nodes with no parents/inputs)
-    start_nodes = [node_id for node_id, parent_list in parents.items() if len( parent_list ) == 0]
+    parent = list( range( len( index ) ) )
+    size   = [1] * len( index )
+    
+    def find( i ):
+        '''Find the root of i, compressing the path behind it'''
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+    
+    # Union the endpoints of every link (smaller tree under larger)
+    for link in links:
+        origin_idx = index.get( link['origin_id'] )
+        target_idx = index.get( link['target_id'] )
+        if origin_idx is None or target_idx is None:
+            continue
+        
+        origin_root = find( origin_idx )
+        target_root = find( target_idx )
+        if origin_root == target_root:
+            continue
+        if size[origin_root] < size[target_root]:
+            origin_root, target_root = target_root, origin_root
+        parent[target_root] = origin_root
+        size[origin_root] += size[target_root]
+    
+    # Group node IDs by root
+    components = {}
+    for node_id, i in index.items():
+        components.setdefault( find( i ), [] ).append( node_id )
+    
+    return list( components.values() )
 
 
-def find_disconnected_components( nodes, links ):
+def filter_workflow_nodes( all_nodes, links ):
     '''
-    Find disconnected components (separate workflows) in the graph.
+    Filter to workflow nodes: nodes connected to at least one link.
     
     Returns:
-        List of components, where each component is a list of node_ids
+        nodes:    list of connected nodes, in their original order
+        node_map: dict mapping node_id -> node data for those nodes
     '''
-    node_ids = {node['id'] for node in nodes}
+    connected_node_ids = {link['origin_id'] for link in links}
+    connected_node_ids.update( [link['target_id'] for link in links] )
     
-    # Build adjacency for undirected graph (connections in both directions)
-    adjacency = {node_id: set() for node_id in node_ids}
-    for link in links:
-        origin_id = link['origin_id']
-        target_id = link['target_id']
-        if origin_id in adjacency and target_id in adjacency:
-            adjacency[origin_id].add( target_id )
-            adjacency[target_id].add( origin_id )
-    
-    # Find connected components using DFS
-    visited = set()
-    components = []
-    
-    def dfs( node_id, component ):
-        visited.add( node_id )
-        component.append( node_id )
-        for neighbor in adjacency[node_id]:
-            if neighbor not in visited:
-                dfs( neighbor, component )
-    
-    for node_id in node_ids:
-        if node_id not in visited:
-            component = []
-            dfs( node_id, component )
-            components.append( component )
-    
-    return components
+    nodes    = [node for node in all_nodes if node['id'] in connected_node_ids]
+    node_map = {node['id']: node for node in nodes}
+    
+    return nodes, node_map
 
 
 def find_all_chains( node_map, children, parents ):
@@ -205,34 +304,250 @@ def find_all_chains( node_map, children, parents ):
     start_nodes = [node_id for node_id, parent_list in parents.items() if len( parent_list ) == 0]
     
     debug( f'\n✓ Found {len( start_nodes )} start nodes (no inputs)')
-    for node_id in start_nodes:
-        node = node_map[node_id]
-        debug( f'  - {node["type"]} (ID: {node_id})' )
+    if debug.level >= 1:
+        for node_id in start_nodes:
+            debug( f'  - {node_map[node_id]["type"]} (ID: {node_id})' )
     
-    # Build all chains using DFS from each start node
+    # Build all chains using iterative DFS from each start node
+    # A single path list is extended/popped in place and only copied at end nodes
     all_chains = []
+    path       = []
+    on_path    = set()  # Guards against cycles (a node can't repeat within a chain)
     
-    def dfs_build_chains( current_id, current_chain ):
-        '''Recursively build chains from current node'''
+    for start_id in start_nodes:
+        start_children = children.get( start_id, [] )
+        if len( start_children ) == 0:
+            all_chains.append( [start_id] )
+            continue
         
-        current_chain = current_chain + [current_id]
+        path.append( start_id )
+        on_path.add( start_id )
+        stack = [iter( start_children )]
+        
+        while stack:
+            child_id = next( stack[-1], None )
+            
+            if child_id is None:
+                # All children explored - step back up the path
+                stack.pop()
+                on_path.discard( path.pop() )
+                continue
+            
+            if child_id in on_path:
+                continue
+            
+            node_children = children.get( child_id, [] )
+            
+            if len( node_children ) == 0:
+                # This is an end node (no outputs), save the chain
+                all_chains.append( path + [child_id] )
+            else:
+                # Continue building chains through each child
+                path.append( child_id )
+                on_path.add( child_id )
+                stack.append( iter( node_children ) )
+    
+    return all_chains
+
+
+def topological_order( children, parents ):
+    '''
+    Order nodes so every node comes after all of its parents (Kahn's algorithm)
+    
+    Returns:
+        List of node_ids; nodes on a cycle (and anything downstream of one) are left out
+    '''
+    in_degree = {node_id: len( parent_list ) for node_id, parent_list in parents.items()}
+    order     = [node_id for node_id, degree in in_degree.items() if degree == 0]
+    
+    for node_id in order:
+        for child_id in children.get( node_id, [] ):
+            in_degree[child_id] -= 1
+            if in_degree[child_id] == 0:
+                order.append( child_id )
+    
+    return order
+
+
+def drop_back_edges( children, parents ):
+    '''
+    Remove the links that close a cycle, leaving an acyclic graph
+    
+    Runs an iterative depth-first search from the start nodes (no inputs),
+    then from any node not reached yet, in node order. A link to a node that
+    is still on the search path closes a cycle and is dropped.
+    
+    Returns:
+        children, parents: new dicts without the dropped links
+    '''
+    
+    back_edges = set()  # (origin_id, target_id)
+    state      = {}     # node_id -> True while on the search path, False once finished
+    roots      = [node_id for node_id, parent_list in parents.items() if len( parent_list ) == 0]
+    
+    for root_id in roots + list( parents ):
+        if root_id in state:
+            continue
         
-        # Get children of current node
-        node_children = children.get( current_id, [] )
+        state[root_id] = True
+        stack = [(root_id, iter( children.get( root_id, [] ) ))]
         
-        if len( node_children ) == 0:
-            # This is an end node (no outputs), save the chain
-            all_chains.append( current_chain )
-        else:
-            # Continue building chains through each child
-            for child_id in node_children:
-                dfs_build_chains( child_id, current_chain )
+        while stack:
+            node_id, child_iter = stack[-1]
+            child_id = next( child_iter, None )
+            
+            if child_id is None:
+                state[node_id] = False
+                stack.pop()
+            elif child_id not in state:
+                state[child_id] = True
+                stack.append( (child_id, iter( children.get( child_id, [] ) )) )
+            elif state[child_id]:
+                back_edges.add( (node_id, child_id) )
+    
+    dag_children = {node_id: [cid for cid in child_list if (node_id, cid) not in back_edges] for node_id, child_list in children.items()}
+    dag_parents  = {node_id: [pid for pid in parent_list if (pid, node_id) not in back_edges] for node_id, parent_list in parents.items()}
+    
+    return dag_children, dag_parents
+
+
+def find_longest_chains( node_map, children, parents, order=None ):
+    '''
+    Find the longest chains from start nodes (no inputs) to end nodes (no outputs)
+    
+    For acyclic graphs, each node's longest distance to an end node is computed
+    in one topological pass, and only chains that stay on a longest path are
+    enumerated. Chains come out in the same order find_all_chains would list them.
+    If there are more than MAX_LONGEST_CHAINS of them, a covering set from
+    cover_longest_paths is returned instead.
+    Cyclic graphs are handled the same way once drop_back_edges has removed
+    the links that close each cycle.
+    
+    Args:
+        order: Result of topological_order, if already computed
+    
+    Returns:
+        List of longest chains, where each chain is a list of node_ids
+    '''
+    
+    if order is None:
+        order = topological_order( children, parents )
+    
+    if len( order ) < len( parents ):
+        # Cycle - enumerating every path is exponential, so lay out the acyclic rest
+        children, parents = drop_back_edges( children, parents )
+        order = topological_order( children, parents )
+    
+    # Find start nodes (nodes with no parents/inputs)
+    start_nodes = [node_id for node_id, parent_list in parents.items() if len( parent_list ) == 0]
+    
+    debug( f'\n✓ Found {len( start_nodes )} start nodes (no inputs)')
+    if debug.level >= 1:
+        for node_id in start_nodes:
+            debug( f'  - {node_map[node_id]["type"]} (ID: {node_id})' )
+    
+    # Longest chain length (in nodes) from each node to an end node
+    height = {}
+    for node_id in reversed( order ):
+        node_children = children.get( node_id, [] )
+        height[node_id] = 1 + max( (height[child_id] for child_id in node_children), default=0 )
+    
+    max_length = max( (height[node_id] for node_id in start_nodes), default=0 )
+    
+    # Walk only edges that stay on a longest path, in child order
+    longest_chains = []
+    path           = []
     
-    # Start DFS from each start node
     for start_id in start_nodes:
-        dfs_build_chains( start_id, [] )
+        if height[start_id] != max_length:
+            continue
+        if max_length == 1:
+            longest_chains.append( [start_id] )
+            continue
+        
+        path.append( start_id )
+        stack = [iter( children[start_id] )]
+        
+        while stack:
+            child_id = next( stack[-1], None )
+            
+            if child_id is None:
+                stack.pop()
+                path.pop()
+                continue
+            
+            if height[child_id] != max_length - len( path ):
+                continue
+            
+            if height[child_id] == 1:
+                longest_chains.append( path + [child_id] )
+                if len( longest_chains ) > MAX_LONGEST_CHAINS:
+                    debug( f'✓ More than {MAX_LONGEST_CHAINS} longest chains, covering their nodes instead' )
+                    return cover_longest_paths( children, parents, order, height, max_length )
+            else:
+                path.append( child_id )
+                stack.append( iter( children[child_id] ) )
     
-    return all_chains
+    return longest_chains
+
+
+def cover_longest_paths( children, parents, order, height, max_length ):
+    '''
+    Build a few longest chains that together visit every node on a longest path
+    
+    A node is on a longest path when its depth (longest chain from a start node
+    to it) and height add up to max_length + 1; every longest chain puts it at
+    column depth - 1. Each chain is grown up and down from the first uncovered
+    such node, preferring uncovered neighbours, so there is at most one chain
+    per node instead of one per tied path.
+    
+    Args:
+        order:      Topological order of all nodes
+        height:     node_id -> longest chain length (in nodes) to an end node
+        max_length: Length of the longest chains
+    
+    Returns:
+        List of longest chains, where each chain is a list of node_ids
+    '''
+    
+    # Longest chain length (in nodes) from a start node to each node
+    depth = {}
+    for node_id in order:
+        depth[node_id] = 1 + max( (depth[parent_id] for parent_id in parents.get( node_id, [] )), default=0 )
+    
+    covered = set()
+    chains  = []
+    
+    def next_on_path( candidates, lengths, wanted ):
+        '''First uncovered candidate whose depth/height is wanted, else the first such candidate'''
+        found = None
+        for candidate_id in candidates:
+            if lengths[candidate_id] == wanted:
+                if candidate_id not in covered:
+                    return candidate_id
+                if found is None:
+                    found = candidate_id
+        return found
+    
+    for node_id in order:
+        if node_id in covered or depth[node_id] + height[node_id] != max_length + 1:
+            continue
+        
+        # Walk up to a start node, then down to an end node
+        upward = [node_id]
+        while depth[upward[-1]] > 1:
+            current = upward[-1]
+            upward.append( next_on_path( parents[current], depth, depth[current] - 1 ) )
+        
+        chain = upward[::-1]
+        while height[chain[-1]] > 1:
+            current = chain[-1]
+            chain.append( next_on_path( children[current], height, height[current] - 1 ) )
+        
+        covered.update( chain )
+        chains.append( chain )
+    
+    return chains
 
 
 def organize_nodes( graph_data ):
@@ -291,13 +606,7 @@ def organize_nodes( graph_data ):
     
     # Filter to only workflow nodes (nodes that have inputs or outputs with connections)
     # Exclude notes, text, groups, and other non-workflow elements
-    connected_node_ids = set()
-    for link in links:
-        connected_node_ids.add( link['origin_id'] )
-        connected_node_ids.add( link['target_id'] )
-    
-    # Only process nodes that are connected via links
-    nodes = [node for node in all_nodes if node['id'] in connected_node_ids]
+    nodes, node_map = filter_workflow_nodes( all_nodes, links )
     
     excluded_count = len(all_nodes) - len(nodes)
     if excluded_count > 0:
@@ -323,17 +632,9 @@ def organize_nodes( graph_data ):
         # Apply starting position offset using bounds (including title bar)
         if result['status'] == 'success' and result['positions']:
             # Find current top-left corner using bounds (visual position with title bar)
-            current_bounds_list = []
-            for node_id, pos in result['positions'].items():
-                # Reconstruct node dict with updated position for bounds calculation
-                node = next((n for n in nodes if n['id'] == node_id), None)
-                if node:
-                    temp_node = node.copy()
-                    temp_node['pos'] = pos
-                    current_bounds_list.append(get_node_bounds(temp_node))
-            
-            current_min_x = min( bounds['left'] for bounds in current_bounds_list )
-            current_min_y = min( bounds['top'] for bounds in current_bounds_list )
+            # (a node's bounds start at its X and one title bar above its Y)
+            current_min_x = min( pos[0] for pos in result['positions'].values() )
+            current_min_y = min( pos[1] - NODE_TITLE_BAR_HEIGHT for pos in result['positions'].values() )
             
             # Calculate offset to move visual top-left to target
             offset_x = target_start_x - current_min_x
@@ -355,20 +656,32 @@ def organize_nodes( graph_data ):
         # Organize each component and calculate its layout bounds
         component_results = []
         
+        # Bucket nodes and links by component in one pass each
+        node_to_component = {}
         for i, component_node_ids in enumerate( components ):
-            debug( f'\n--- Component {i+1}/{len(components)} with {len(component_node_ids)} nodes ---' )
+            for node_id in component_node_ids:
+                node_to_component[node_id] = i
+        
+        component_links_list = [[] for _ in components]
+        for l in links:
+            origin_comp = node_to_component.get( l['origin_id'] )
+            if origin_comp is not None and origin_comp == node_to_component.get( l['target_id'] ):
+                component_links_list[origin_comp].append( l )
+        
+        for i, component_node_ids in enumerate( components ):
+            if debug.level >= 1:
+                debug( f'\n--- Component {i+1}/{len(components)} with {len(component_node_ids)} nodes ---' )
             
-            # Filter nodes and links for this component
-            component_nodes = [n for n in nodes if n['id'] in component_node_ids]
-            component_links = [l for l in links if l['origin_id'] in component_node_ids and l['target_id'] in component_node_ids]
+            # Nodes and links for this component
+            component_nodes = [node_map[nid] for nid in component_node_ids]
+            component_links = component_links_list[i]
             
             # Organize this component
             result = organize_single_component( component_nodes, component_links, 0 )
             
             if result['status'] == 'success' and result['positions']:
                 # Calculate bounding box height
-                max_y = max( pos[1] + [n for n in component_nodes if n['id'] == nid][0]['size'][1] 
-                            for nid, pos in result['positions'].items() )
+                max_y = max( pos[1] + node_map[nid]['size'][1] for nid, pos in result['positions'].items() )
                 min_y = min( pos[1] for pos in result['positions'].values() )
                 height = max_y - min_y
                 
@@ -391,7 +704,8 @@ def organize_nodes( graph_data ):
         component_spacing = 200  # Vertical spacing between components
         
         for i, comp in enumerate( component_results ):
-            debug( f'\nComponent {i+1}: height={comp["height"]:.0f}, nodes={comp["node_count"]}' )
+            if debug.level >= 1:
+                debug( f'\nComponent {i+1}: height={comp["height"]:.0f}, nodes={comp["node_count"]}' )
             
             # Find minimum Y in this component
             min_y = min( pos[1] for pos in comp['positions'].values() )
@@ -400,7 +714,8 @@ def organize_nodes( graph_data ):
             for node_id, pos in comp['positions'].items():
                 adjusted_y = pos[1] - min_y + current_y_offset
                 all_positions[node_id] = [pos[0], adjusted_y]
-                debug( f'  Node {node_id}: Y {pos[1]:.0f} -> {adjusted_y:.0f}' )
+                if debug.level >= 1:
+                    debug( f'  Node {node_id}: Y {pos[1]:.0f} -> {adjusted_y:.0f}' )
             
             # Copy sizes
             all_sizes.update( comp['sizes'] )
@@ -413,17 +728,9 @@ def organize_nodes( graph_data ):
         # Apply starting position offset using bounds (including title bar)
         if all_positions:
             # Find current top-left corner using bounds (visual position with title bar)
-            current_bounds_list = []
-            for node_id, pos in all_positions.items():
-                # Reconstruct node dict with updated position for bounds calculation
-                node = next((n for n in nodes if n['id'] == node_id), None)
-                if node:
-                    temp_node = node.copy()
-                    temp_node['pos'] = pos
-                    current_bounds_list.append(get_node_bounds(temp_node))
-            
-            current_min_x = min( bounds['left'] for bounds in current_bounds_list )
-            current_min_y = min( bounds['top'] for bounds in current_bounds_list )
+            # (a node's bounds start at its X and one title bar above its Y)
+            current_min_x = min( pos[0] for pos in all_positions.values() )
+            current_min_y = min( pos[1] - NODE_TITLE_BAR_HEIGHT for pos in all_positions.values() )
             
             # Calculate offset to move visual top-left to target
             offset_x = target_start_x - current_min_x
@@ -471,13 +778,18 @@ def organize_single_component( nodes, links, start_y ):
     # Build graph representation
     node_map, children, parents = build_node_graph( nodes, links )
     
-    # Find all chains
-    chains = find_all_chains( node_map, children, parents )
-    
-    debug( f'✓ Found {len( chains )} chains from start to end' )
+    # Index links by endpoint for the port position lookups in Step 7
+    links_by_origin = defaultdict( list )
+    links_by_target = defaultdict( list )
+    for link in links:
+        links_by_origin[link['origin_id']].append( link )
+        links_by_target[link['target_id']].append( link )
     
     # Find longest chain(s)
-    if not chains:
+    order          = topological_order( children, parents )
+    longest_chains = find_longest_chains( node_map, children, parents, order )
+    
+    if not longest_chains:
         print( '⚠ No complete chains found (nodes may be isolated or circular)' )
         return {
             'status':    'success',
@@ -485,9 +797,7 @@ def organize_single_component( nodes, links, start_y ):
             'positions': {}
         }
     
-    # Find the longest chain(s)
-    max_length     = max( len( chain ) for chain in chains )
-    longest_chains = [chain for chain in chains if len( chain ) == max_length]
+    max_length = len( longest_chains[0] )
     
     debug( f'\n✓ Longest chain length: {max_length} nodes' )
     debug( f'✓ Number of longest chains: {len( longest_chains )}' )
@@ -497,21 +807,17 @@ def organize_single_component( nodes, links, start_y ):
     COLUMN_SPACING = 100  # Extra spacing between columns
     ROW_HEIGHT     = 150  # Vertical spacing between chains
     
-    # First pass: determine which nodes go in which columns and track max width per column
-    column_nodes  = {}  # column_idx -> list of node_ids
-    column_widths = {}  # column_idx -> max width
+    # Node widths, looked up repeatedly while columns are sized below
+    node_widths = {node_id: node['size'][0] for node_id, node in node_map.items()}
+    
+    # First pass: track max width per column
+    # Chain positions are the column indices, so every column 0..max_length-1 exists
+    column_widths = dict.fromkeys( range( max_length ), 0 )  # column_idx -> max width
     
-    # Assign nodes to columns based on their position in the longest chains
+    # Widen columns based on the nodes at each position in the longest chains
     for chain in longest_chains:
         for col_idx, node_id in enumerate(chain):
-            if col_idx not in column_nodes:
-                column_nodes[col_idx]  = []
-                column_widths[col_idx] = 0
-            
-            if node_id not in column_nodes[col_idx]:
-                column_nodes[col_idx].append( node_id )
-                node_width = node_map[node_id]['size'][0]
-                column_widths[col_idx] = max( column_widths[col_idx], node_width )
+            column_widths[col_idx] = max( column_widths[col_idx], node_widths[node_id] )
     
     # Calculate X positions for each column based on cumulative widths
     column_x_positions = {}
@@ -520,31 +826,36 @@ def organize_single_component( nodes, links, start_y ):
     debug( '\nColumn layout:' )
     for col_idx in sorted( column_widths.keys() ):
         column_x_positions[col_idx] = current_x
-        debug( f'  Column {col_idx}: X={current_x}, Max Width={column_widths[col_idx]}' )
+        if debug.level >= 1:
+            debug( f'  Column {col_idx}: X={current_x}, Max Width={column_widths[col_idx]}' )
         current_x += column_widths[col_idx] + COLUMN_SPACING
     
     # Assign positions to nodes in longest chains
-    positioned_nodes = set()
-    new_positions    = {}
+    # node_columns also serves as the set of positioned nodes
+    new_positions = {}
+    node_columns  = {}  # node_id -> column_idx
     
     debug( '\nArranging longest chains:' )
     for chain_idx, chain in enumerate(longest_chains):
-        debug( f'\n  Chain {chain_idx + 1}:' )
+        if debug.level >= 1:
+            debug( f'\n  Chain {chain_idx + 1}:' )
         y_pos = start_y + (chain_idx * ROW_HEIGHT)
         
         for col_idx, node_id in enumerate(chain):
-            if node_id not in positioned_nodes:
+            if node_id not in node_columns:
                 x_pos = column_x_positions[col_idx]
                 new_positions[node_id] = [x_pos, y_pos]
-                positioned_nodes.add( node_id )
+                node_columns[node_id]  = col_idx
                 
                 node = node_map[node_id]
-                debug( f'    Column {col_idx}: {node["type"]}({node_id}) width={node["size"][0]} -> [{x_pos}, {y_pos}]' )
+                if debug.level >= 1:
+                    debug( f'    Column {col_idx}: {node["type"]}({node_id}) width={node["size"][0]} -> [{x_pos}, {y_pos}]' )
             else:
                 # Node already positioned (shared between chains)
                 existing_pos = new_positions[node_id]
                 node = node_map[node_id]
-                debug( f'    Column {col_idx}: {node["type"]}({node_id}) -> already at {existing_pos}' )
+                if debug.level >= 1:
+                    debug( f'    Column {col_idx}: {node["type"]}({node_id}) -> already at {existing_pos}' )
     
     debug( f'\n✓ Positioned {len( new_positions )} nodes from longest chains' )
     unpositioned_count = len(nodes) - len(new_positions)
@@ -556,77 +867,19 @@ def organize_single_component( nodes, links, start_y ):
         debug( 'Step 4: Assigning columns for remaining nodes' )
         debug( '-'*50 )
         
-        # Create reverse mapping: position -> column index
-        pos_to_column = {}
-        for col_idx in column_x_positions:
-            pos_to_column[column_x_positions[col_idx]] = col_idx
-        
-        # Track which nodes are positioned and their columns
-        node_columns = {}  # node_id -> column_idx
-        for node_id, pos in new_positions.items():
-            x_pos = pos[0]
-            if x_pos in pos_to_column:
-                node_columns[node_id] = pos_to_column[x_pos]
+        # Highest column index so far (chain columns are 0..max_length-1)
+        last_col = max_length - 1
         
-        # Find unpositioned nodes
-        unpositioned_nodes = [node_id for node_id in node_map.keys() if node_id not in positioned_nodes]
-        
-        debug( f'\nProcessing {len( unpositioned_nodes )} unpositioned nodes:' )
-        
-        for node_id in unpositioned_nodes:
-            node          = node_map[node_id]
-            target_column = None
-            
-            # Check if node has positioned children (nodes it outputs to)
-            positioned_children = [child_id for child_id in children.get( node_id, [] ) if child_id in node_columns]
-            
-            # Check if node has positioned parents (nodes it receives input from)
-            positioned_parents = [parent_id for parent_id in parents.get(node_id, []) if parent_id in node_columns]
-            
-            # Determine column placement
-            if positioned_parents:
-                # Place in column after the last (rightmost) positioned parent
-                parent_columns = [node_columns[pid] for pid in positioned_parents]
-                max_parent_col = max( parent_columns )
-                target_column  = max_parent_col + 1
-                debug( f'  {node["type"]}({node_id}): Has parents in columns {parent_columns} -> placing in column {target_column}' )
-
-            elif positioned_children:
-                # Place in column before the first (leftmost) positioned child
-                # BUT: only if this node is truly a predecessor (has no inputs from other nodes)
-                # If the node has inputs, it should go AFTER its inputs, not before its outputs
-                child_columns = [node_columns[cid] for cid in positioned_children]
-                min_child_col = min( child_columns )
-                
-                # Check if this node actually has any connections (parents or children)
-                has_inputs = len(parents.get(node_id, [])) > 0
-                
-                if has_inputs:
-                    # This node has inputs but they're not positioned yet
-                    # Don't place it before its children - place it at end for now
-                    # It will be handled in another pass or positioned at the end
-                    target_column = max(column_x_positions.keys()) + 1 if column_x_positions else 0
-                    debug( f'  {node["type"]}({node_id}): Has unpositioned inputs and children in columns {child_columns} -> deferring to column {target_column}' )
-                elif min_child_col <= 0:
-                    # Children are at the start and node has no inputs - place at start
-                    target_column = 0
-                    debug( f'  {node["type"]}({node_id}): No inputs, children at start -> placing in column 0' )
-                else:
-                    target_column = min_child_col - 1
-                    debug( f'  {node["type"]}({node_id}): No inputs, has children in columns {child_columns} -> placing in column {target_column}' )
-
-            else:
-                # Node is isolated or only connects to other unpositioned nodes
-                # Place it in a new column at the end
-                target_column = max( column_x_positions.keys()) + 1 if column_x_positions else 0
-                debug( f'  {node["type"]}({node_id}): Isolated -> placing in new column {target_column}' )
+        def assign_column( node_id, target_column ):
+            '''Record a node's column, creating the column or widening it as needed'''
+            nonlocal last_col
+            node_width = node_widths[node_id]
             
             # Ensure column exists
             if target_column not in column_x_positions:
                 
                 # Create new column
                 if column_x_positions:
-                    last_col   = max( column_x_positions.keys() )
                     last_x     = column_x_positions[last_col]
                     last_width = column_widths[last_col]
                     new_x      = last_x + last_width + COLUMN_SPACING
@@ -634,27 +887,76 @@ def organize_single_component( nodes, links, start_y ):
                     new_x = START_X
                 
                 column_x_positions[target_column] = new_x
-                column_widths[target_column] = node['size'][0]
-                debug( f'    Created new column {target_column} at X={new_x}' )
+                column_widths[target_column] = node_width
+                last_col = max( last_col, target_column )
+                if debug.level >= 1:
+                    debug( f'    Created new column {target_column} at X={new_x}' )
             else:
                 # Update column width if this node is wider
-                column_widths[target_column] = max( column_widths[target_column], node['size'][0] )
+                column_widths[target_column] = max( column_widths[target_column], node_width )
             
             # Store column assignment (Y position will be determined in Step 5)
             node_columns[node_id] = target_column
-            positioned_nodes.add( node_id )
-            debug( f'    Assigned to column {target_column}' )
-    else:
-        # Create node_columns mapping for already positioned nodes
-        pos_to_column = {}
-        for col_idx in column_x_positions:
-            pos_to_column[column_x_positions[col_idx]] = col_idx
+            if debug.level >= 1:
+                debug( f'    Assigned to column {target_column}' )
+        
+        # Visit nodes in topological order; nodes on a cycle go last, in node order
+        ordered_ids = set( order )
+        node_order  = order + [node_id for node_id in node_map if node_id not in ordered_ids]
+        
+        unpositioned_nodes = [node_id for node_id in node_order if node_id not in node_columns]
+        
+        debug( f'\nProcessing {len( unpositioned_nodes )} unpositioned nodes:' )
         
-        node_columns = {}
-        for node_id, pos in new_positions.items():
-            x_pos = pos[0]
-            if x_pos in pos_to_column:
-                node_columns[node_id] = pos_to_column[x_pos]
+        # Forward pass: every parent is visited before its children, so a node
+        # whose parents get a column sees all of them placed
+        without_parents = []
+        for node_id in unpositioned_nodes:
+            
+            # Columns of positioned parents (nodes it receives input from)
+            parent_columns = [node_columns[pid] for pid in parents.get( node_id, () ) if pid in node_columns]
+            
+            if not parent_columns:
+                without_parents.append( node_id )
+                continue
+            
+            # Place in column after the last (rightmost) positioned parent
+            target_column = max( parent_columns ) + 1
+            if debug.level >= 1:
+                debug( f'  {node_map[node_id]["type"]}({node_id}): Has parents in columns {parent_columns} -> placing in column {target_column}' )
+            
+            assign_column( node_id, target_column )
+        
+        # Backward pass: the remaining nodes only feed into the graph, so place
+        # them before their children, visiting children before their parents
+        for node_id in reversed( without_parents ):
+            node = node_map[node_id]
+            
+            # Columns of positioned children (nodes it outputs to)
+            child_columns = [node_columns[cid] for cid in children.get( node_id, () ) if cid in node_columns]
+            
+            if child_columns:
+                # Place in column before the first (leftmost) positioned child
+                min_child_col = min( child_columns )
+                
+                if min_child_col <= 0:
+                    # Children are at the start - place at start
+                    target_column = 0
+                    if debug.level >= 1:
+                        debug( f'  {node["type"]}({node_id}): Children at start -> placing in column 0' )
+                else:
+                    target_column = min_child_col - 1
+                    if debug.level >= 1:
+                        debug( f'  {node["type"]}({node_id}): Has children in columns {child_columns} -> placing in column {target_column}' )
+            
+            else:
+                # Node is isolated or only connects to other unpositioned nodes
+                # Place it in a new column at the end
+                target_column = last_col + 1
+                if debug.level >= 1:
+                    debug( f'  {node["type"]}({node_id}): Isolated -> placing in new column {target_column}' )
+            
+            assign_column( node_id, target_column )
     
     # Step 5: Sort nodes vertically within each column based on connected ports
     # DEFERRED TO AFTER STEP 6D - Columns must be finalized first
@@ -668,62 +970,69 @@ def organize_single_component( nodes, links, start_y ):
     # Initialize node_sizes with original sizes (don't resize yet)
     node_sizes = {}
     for node_id in node_map.keys():
-        node_sizes[node_id] = [node_map[node_id]['size'][0], node_map[node_id]['size'][1]]
+        node_sizes[node_id] = [node_widths[node_id], node_map[node_id]['size'][1]]
     
     max_iterations = 20
     iteration = 0
     
+    # (link, origin_id, target_id) for links between assigned nodes; only their columns change from here on
+    column_links = [
+        (link, link['origin_id'], link['target_id']) for link in links
+        if link['origin_id'] in node_columns and link['target_id'] in node_columns
+    ]
+    
+    # Column widths based on current node assignments, with each column's
+    # nodes so only the columns that nodes move between need recomputing
+    column_members = defaultdict( set )
+    column_widths  = {}
+    for node_id, col_idx in node_columns.items():
+        column_members[col_idx].add( node_id )
+        node_width = node_sizes[node_id][0]
+        if col_idx not in column_widths:
+            column_widths[col_idx] = node_width
+        else:
+            column_widths[col_idx] = max(column_widths[col_idx], node_width)
+    
+    # Column indices in ascending order, kept sorted as columns are added
+    column_order = sorted( column_x_positions )
+    
     while iteration < max_iterations:
         iteration += 1
         
-        # Recalculate column widths based on current node assignments
-        column_widths = {}
-        for node_id in node_columns.keys():
-            col_idx = node_columns.get(node_id)
-            if col_idx is not None and node_id in node_sizes:
-                node_width = node_sizes[node_id][0]
-                if col_idx not in column_widths:
-                    column_widths[col_idx] = node_width
-                else:
-                    column_widths[col_idx] = max(column_widths[col_idx], node_width)
-        
         # Detect leftward connections
         leftward_links = []
         debug( f'\nIteration {iteration}: Checking {len(links)} links for leftward connections' )
-        debug( f'  Column widths: {column_widths}' )
+        if debug.level >= 1:
+            debug( f'  Column widths: {column_widths}' )
         
-        for link in links:
-            origin_id = link['origin_id']
-            target_id = link['target_id']
-            
-            if origin_id not in node_columns or target_id not in node_columns:
-                continue
+        # Right edge of each column - use column width since nodes will be resized
+        # (every column with an assigned node has a width)
+        column_rights = {col_idx: column_x_positions.get(col_idx, 0) + width for col_idx, width in column_widths.items()}
+        
+        get_column_x = column_x_positions.get
+        
+        for link, origin_id, target_id in column_links:
             
             # Get X positions from column assignments
-            origin_col = node_columns[origin_id]
-            target_col = node_columns[target_id]
-            origin_x = column_x_positions.get(origin_col, 0)
-            target_x = column_x_positions.get(target_col, 0)
-            
-            # Get origin node width - use column width since nodes will be resized
-            if origin_col in column_widths:
-                origin_width = column_widths[origin_col]
-            else:
-                origin_width = node_sizes.get(origin_id, node_map[origin_id]['size'])[0]
-            
-            origin_right = origin_x + origin_width
+            origin_col   = node_columns[origin_id]
+            target_col   = node_columns[target_id]
+            target_x     = get_column_x(target_col, 0)
+            origin_right = column_rights[origin_col]
             
             # Check if target is to the left of origin's right edge
             if target_x < origin_right:
                 distance = origin_right - target_x
-                debug( f'  Leftward: {origin_id} (col {origin_col}, x={origin_x:.0f}, width={origin_width:.0f}, right={origin_right:.0f}) -> {target_id} (col {node_columns[target_id]}, x={target_x:.0f}) distance={distance:.0f}' )
+                if debug.level >= 1:
+                    origin_x     = get_column_x(origin_col, 0)
+                    origin_width = column_widths[origin_col]
+                    debug( f'  Leftward: {origin_id} (col {origin_col}, x={origin_x:.0f}, width={origin_width:.0f}, right={origin_right:.0f}) -> {target_id} (col {target_col}, x={target_x:.0f}) distance={distance:.0f}' )
                 leftward_links.append({
                     'link': link,
                     'origin_id': origin_id,
                     'target_id': target_id,
                     'distance': distance,
-                    'origin_col': node_columns[origin_id],
-                    'target_col': node_columns[target_id]
+                    'origin_col': origin_col,
+                    'target_col': target_col
                 })
         
         if not leftward_links:
@@ -741,6 +1050,7 @@ def organize_single_component( nodes, links, start_y ):
             targets_to_fix[target_id].append(lw)
         
         # For each target that needs fixing, move it to come after its rightmost origin
+        changed_columns = set()
         for target_id, lw_links in targets_to_fix.items():
             # Find the rightmost origin column
             max_origin_col = max(lw['origin_col'] for lw in lw_links)
@@ -750,21 +1060,16 @@ def organize_single_component( nodes, links, start_y ):
             # Try existing columns after max_origin_col first, then create new if needed
             new_target_col = None
             
-            # Look for an existing column we can use
-            for col_idx in sorted(column_x_positions.keys()):
-                if col_idx > max_origin_col:
-                    # Check if moving to this column would create new leftward connections
-                    would_create_leftward = False
-                    for link in links:
-                        if link['origin_id'] == target_id:
-                            child_id = link['target_id']
-                            if child_id in node_columns and node_columns[child_id] <= col_idx:
-                                would_create_leftward = True
-                                break
-                    
-                    if not would_create_leftward:
-                        new_target_col = col_idx
-                        break
+            # Moving at or past the leftmost positioned child would create new leftward connections
+            child_columns = [node_columns[cid] for cid in children[target_id] if cid in node_columns]
+            
+            # Look for an existing column we can use: the first one after max_origin_col,
+            # if it is still left of every child
+            next_idx = bisect_right( column_order, max_origin_col )
+            if next_idx < len( column_order ):
+                col_idx = column_order[next_idx]
+                if not child_columns or col_idx < min( child_columns ):
+                    new_target_col = col_idx
             
             # If no existing column works, create a new one
             if new_target_col is None:
@@ -773,10 +1078,14 @@ def organize_single_component( nodes, links, start_y ):
             if new_target_col != current_target_col:
                 # Update the column assignment
                 node_columns[target_id] = new_target_col
+                column_members[current_target_col].discard( target_id )
+                column_members[new_target_col].add( target_id )
+                changed_columns.update( (current_target_col, new_target_col) )
                 
                 # Ensure this column exists in tracking
                 if new_target_col not in column_x_positions:
                     column_x_positions[new_target_col] = 0  # Placeholder
+                    insort( column_order, new_target_col )
                 
                 # Calculate a temporary X position for this iteration
                 # Find the rightmost origin's right edge
@@ -785,7 +1094,7 @@ def organize_single_component( nodes, links, start_y ):
                     origin_id = lw['origin_id']
                     origin_col = node_columns[origin_id]
                     origin_x = column_x_positions.get(origin_col, 0)
-                    origin_width = column_widths.get(origin_col, node_sizes.get(origin_id, node_map[origin_id]['size'])[0])
+                    origin_width = column_widths.get(origin_col, node_widths[origin_id])
                     origin_right = origin_x + origin_width
                     max_origin_right = max(max_origin_right, origin_right)
                 
@@ -793,9 +1102,20 @@ def organize_single_component( nodes, links, start_y ):
                 temp_x = max_origin_right + COLUMN_SPACING
                 column_x_positions[new_target_col] = temp_x
                 
-                debug( f'  Moved {node_map[target_id]["type"]}({target_id}): col {current_target_col} -> col {new_target_col} (temp x={temp_x:.0f})' )
+                if debug.level >= 1:
+                    debug( f'  Moved {node_map[target_id]["type"]}({target_id}): col {current_target_col} -> col {new_target_col} (temp x={temp_x:.0f})' )
         
         debug( f'  Fixed {len(targets_to_fix)} nodes in this iteration' )
+        
+        # Recalculate widths of the columns nodes moved between (only after all
+        # moves, so the temporary X positions above used this iteration's widths)
+        for col_idx in changed_columns:
+            members = column_members[col_idx]
+            if members:
+                column_widths[col_idx] = max( node_sizes[node_id][0] for node_id in members )
+            else:
+                del column_members[col_idx]
+                column_widths.pop( col_idx, None )
     
     if iteration >= max_iterations:
         debug( f'\n⚠ Warning: Stopped after {max_iterations} iterations (possible circular dependencies)' )
@@ -805,15 +1125,12 @@ def organize_single_component( nodes, links, start_y ):
     debug( 'Step 6b: Rebuilding column structure after leftward fixes' )
     debug( '-'*50 )
     
-    # Get all columns in order
-    sorted_columns = sorted(column_x_positions.keys())
-    
     # Rebuild columns_to_nodes mapping based on final node_columns
-    columns_to_nodes = {}
+    # (built here rather than maintained during Step 6 so each column keeps
+    # node_columns order, which Step 7's stable sort uses to break ties)
+    columns_to_nodes = defaultdict( list )
     for node_id, col_idx in node_columns.items():
-        if col_idx not in columns_to_nodes:
-            columns_to_nodes[col_idx] = []
-        columns_to_nodes[col_idx].append(node_id)
+        columns_to_nodes[col_idx].append( node_id )
     
     # Remove empty columns from column_x_positions and column_widths
     empty_columns = [col_idx for col_idx in column_x_positions.keys() if col_idx not in columns_to_nodes]
@@ -821,20 +1138,22 @@ def organize_single_component( nodes, links, start_y ):
         del column_x_positions[col_idx]
         if col_idx in column_widths:
             del column_widths[col_idx]
-        debug( f'  Removed empty column {col_idx}' )
+        if debug.level >= 1:
+            debug( f'  Removed empty column {col_idx}' )
     
     if empty_columns:
         debug( f'  Removed {len(empty_columns)} empty columns: {empty_columns}' )
     
-    # Update sorted_columns after removing empties
+    # Get the remaining columns in order
     sorted_columns = sorted(column_x_positions.keys())
     
     # Recalculate column widths based on actual nodes in each column
     for col_idx in sorted_columns:
         if col_idx in columns_to_nodes:
-            max_width = max(node_map[node_id]['size'][0] for node_id in columns_to_nodes[col_idx])
+            max_width = max(node_widths[node_id] for node_id in columns_to_nodes[col_idx])
             column_widths[col_idx] = max_width
-            debug( f'  Column {col_idx}: {len(columns_to_nodes[col_idx])} nodes, max width={max_width}' )
+            if debug.level >= 1:
+                debug( f'  Column {col_idx}: {len(columns_to_nodes[col_idx])} nodes, max width={max_width}' )
     
     debug( f'\n✓ Rebuilt column structure with {len(sorted_columns)} columns' )
     
@@ -850,14 +1169,15 @@ def organize_single_component( nodes, links, start_y ):
         nodes_in_column = columns_to_nodes[col_idx]
         column_width = column_widths[col_idx]
         
-        debug( f'Column {col_idx}: Setting all {len(nodes_in_column)} nodes to width {column_width}', 2 )
+        if debug.level >= 2:
+            debug( f'Column {col_idx}: Setting all {len(nodes_in_column)} nodes to width {column_width}', 2 )
         
         for node_id in nodes_in_column:
             node = node_map[node_id]
-            original_width = node['size'][0]
+            original_width = node_widths[node_id]
             node_sizes[node_id] = [column_width, node['size'][1]]
             
-            if original_width != column_width:
+            if debug.level >= 3 and original_width != column_width:
                 debug( f'  {node["type"]}({node_id}): {original_width} -> {column_width}', 3 )
     
     debug( f'\n✓ Resized {len(node_sizes)} nodes to match column widths' )
@@ -873,12 +1193,10 @@ def organize_single_component( nodes, links, start_y ):
         old_x = column_x_positions[col_idx]
         column_x_positions[col_idx] = current_x
         
-        debug( f'  Column {col_idx}: X={old_x:.0f} -> {current_x:.0f} (width={column_widths[col_idx]})', 2 )
+        if debug.level >= 2:
+            debug( f'  Column {col_idx}: X={old_x:.0f} -> {current_x:.0f} (width={column_widths[col_idx]})', 2 )
         
-        # Update all nodes in this column
-        for node_id, node_col in node_columns.items():
-            if node_col == col_idx and node_id in new_positions:
-                new_positions[node_id][0] = current_x
+        # Node positions pick up the new X in Step 7, which places every column
         
         # Move to next column position
         current_x += column_widths[col_idx] + COLUMN_SPACING
@@ -893,31 +1211,31 @@ def organize_single_component( nodes, links, start_y ):
     NODE_VERTICAL_SPACING = 60
     PORT_SPACING = 20
     
-    def calculate_port_y( node_id, slot_index, is_output=True ):
-        '''Calculate estimated Y position of a port on a node'''
-        if node_id not in new_positions:
-            return 0
-        node_y = new_positions[node_id][1]
-        port_offset = 30 + (slot_index * PORT_SPACING)
-        return node_y + port_offset
+    # Appended to every sort key: a node whose ports are a prefix of another's
+    # sorts after it, and nodes without connections sort last
+    SORT_KEY_END = (float( 'inf' ),)
+    
+    # A port's offset below its node's top never changes, only the node's Y
+    # does as columns are sorted - pair each connected node with that offset once
+    input_ports  = {}  # node_id -> [(parent_id, parent output port offset)]
+    output_ports = {}  # node_id -> [(child_id, child input port offset)]
+    for node_id, node_links in links_by_target.items():
+        input_ports[node_id] = [(link['origin_id'], 30 + link['origin_slot'] * PORT_SPACING) for link in node_links]
+    for node_id, node_links in links_by_origin.items():
+        output_ports[node_id] = [(link['target_id'], 30 + link['target_slot'] * PORT_SPACING) for link in node_links]
     
     def get_connected_port_positions( node_id ):
         '''Get Y positions of all ports this node connects to, sorted by Y'''
         port_positions = []
-        for link in links:
-            if link['target_id'] == node_id:
-                parent_id = link['origin_id']
-                origin_slot = link['origin_slot']
-                if parent_id in new_positions:
-                    port_y = calculate_port_y( parent_id, origin_slot, is_output=True )
-                    port_positions.append( port_y )
-            if link['origin_id'] == node_id:
-                child_id = link['target_id']
-                target_slot = link['target_slot']
-                if child_id in new_positions:
-                    port_y = calculate_port_y( child_id, target_slot, is_output=False )
-                    port_positions.append( port_y )
-        return sorted( port_positions )
+        for parent_id, port_offset in input_ports.get( node_id, () ):
+            if parent_id in new_positions:
+                port_positions.append( new_positions[parent_id][1] + port_offset )
+        for child_id, port_offset in output_ports.get( node_id, () ):
+            if child_id in new_positions:
+                port_positions.append( new_positions[child_id][1] + port_offset )
+        # Sort keys compare these element by element, so they must be in Y order
+        port_positions.sort()
+        return port_positions
     
     # Sort each column vertically
     for col_idx in sorted_columns:
@@ -927,23 +1245,25 @@ def organize_single_component( nodes, links, start_y ):
         nodes_in_column = columns_to_nodes[col_idx]
         x_pos = column_x_positions[col_idx]
         
-        debug( f'\nColumn {col_idx} (X={x_pos}): {len(nodes_in_column)} nodes' )
+        if debug.level >= 1:
+            debug( f'\nColumn {col_idx} (X={x_pos}): {len(nodes_in_column)} nodes' )
         
-        def sort_key( node_id ):
-            port_positions = get_connected_port_positions( node_id )
-            return port_positions + [float('inf')] * 10 if port_positions else [float('inf')] * 10
+        # Port positions are computed once per node, before this column moves
+        column_ports = {node_id: get_connected_port_positions( node_id ) for node_id in nodes_in_column}
         
-        sorted_nodes = sorted( nodes_in_column, key=sort_key )
+        sort_keys = {node_id: tuple( ports ) + SORT_KEY_END for node_id, ports in column_ports.items()}
+        sorted_nodes = sorted( nodes_in_column, key=sort_keys.__getitem__ )
         current_y = start_y
         
         for node_id in sorted_nodes:
             node = node_map[node_id]
             node_height = node_sizes[node_id][1]
-            port_positions = get_connected_port_positions( node_id )
+            port_positions = column_ports[node_id]
             
             new_positions[node_id] = [x_pos, current_y]
-            port_str = f'ports at {port_positions}' if port_positions else 'no connections'
-            debug( f'  {node["type"]}({node_id}): {port_str} -> Y={current_y}', 2 )
+            if debug.level >= 2:
+                port_str = f'ports at {port_positions}' if port_positions else 'no connections'
+                debug( f'  {node["type"]}({node_id}): {port_str} -> Y={current_y}', 2 )
             
             current_y += node_height + NODE_VERTICAL_SPACING
     
@@ -959,20 +1279,16 @@ def organize_single_component( nodes, links, start_y ):
         
         def get_child_input_port_positions( node_id ):
             port_positions = []
-            for link in links:
-                if link['origin_id'] == node_id:
-                    child_id = link['target_id']
-                    target_slot = link['target_slot']
-                    if child_id in new_positions:
-                        port_y = calculate_port_y( child_id, target_slot, is_output=False )
-                        port_positions.append( port_y )
-            return sorted( port_positions )
-        
-        def first_col_sort_key( node_id ):
-            port_positions = get_child_input_port_positions( node_id )
-            return port_positions + [float('inf')] * 10 if port_positions else [float('inf')] * 10
-        
-        sorted_first_col = sorted( first_column_nodes, key=first_col_sort_key )
+            for child_id, port_offset in output_ports.get( node_id, () ):
+                if child_id in new_positions:
+                    port_positions.append( new_positions[child_id][1] + port_offset )
+            port_positions.sort()
+            return port_positions
+        
+        first_col_ports = {node_id: get_child_input_port_positions( node_id ) for node_id in first_column_nodes}
+        
+        first_col_keys = {node_id: tuple( ports ) + SORT_KEY_END for node_id, ports in first_col_ports.items()}
+        sorted_first_col = sorted( first_column_nodes, key=first_col_keys.__getitem__ )
         x_pos = column_x_positions[0]
         current_y = start_y
         
@@ -981,11 +1297,12 @@ def organize_single_component( nodes, links, start_y ):
         for node_id in sorted_first_col:
             node = node_map[node_id]
             node_height = node_sizes[node_id][1]
-            port_positions = get_child_input_port_positions( node_id )
+            port_positions = first_col_ports[node_id]
             
             new_positions[node_id] = [x_pos, current_y]
-            port_str = f'child ports at {port_positions}' if port_positions else 'no connections'
-            debug( f'  {node["type"]}({node_id}): {port_str} -> Y={current_y}' )
+            if debug.level >= 1:
+                port_str = f'child ports at {port_positions}' if port_positions else 'no connections'
+                debug( f'  {node["type"]}({node_id}): {port_str} -> Y={current_y}' )
             
             current_y += node_height + NODE_VERTICAL_SPACING
         
@@ -1002,7 +1319,7 @@ def organize_single_component( nodes, links, start_y ):
     }
 
 
-def find_horizontal_gaps( nodes, origin_x, origin_y, target_x, target_y, origin_id, target_id ):
+def find_horizontal_gaps( nodes, origin_x, origin_y, target_x, target_y, origin_id, target_id, indices=None ):
     '''
     Find horizontal gaps between nodes that a link could pass through.
     
@@ -1011,6 +1328,8 @@ def find_horizontal_gaps( nodes, origin_x, origin_y, target_x, target_y, origin_
         origin_x, origin_y: Origin point coordinates
         target_x, target_y: Target point coordinates
         origin_id, target_id: IDs of origin and target nodes to skip
+        indices: optional ascending indices into nodes to consider (default: all),
+                 e.g. from query_x_index
         
     Returns:
         List of viable gap dictionaries with 'y', 'distance' keys
@@ -1018,45 +1337,40 @@ def find_horizontal_gaps( nodes, origin_x, origin_y, target_x, target_y, origin_
     min_x = min( origin_x, target_x )
     max_x = max( origin_x, target_x )
     
-    # Find all nodes in the horizontal range
+    if indices is None:
+        indices = range( len( nodes ) )
+    
+    # Find all nodes in the horizontal range, as (top, bottom, id) with the title bar included
     nodes_in_range = []
-    for node in nodes:
-        if node['id'] == origin_id or node['id'] == target_id:
+    for i in indices:
+        node    = nodes[i]
+        node_id = node['id']
+        if node_id == origin_id or node_id == target_id:
             continue
         
-        node_x = node['pos'][0]
-        node_w = node['size'][0]
+        node_x, node_y = node['pos']
+        node_w, node_h = node['size']
         node_right = node_x + node_w
         
         # Check if node is in horizontal range
         if node_right < min_x or node_x > max_x:
             continue
         
-        node_bounds = get_node_bounds( node )
-        nodes_in_range.append( {
-            'id': node['id'],
-            'top': node_bounds['top'],
-            'bottom': node_bounds['bottom'],
-            'left': node_bounds['left'],
-            'right': node_bounds['right']
-        } )
+        nodes_in_range.append( (node_y - NODE_TITLE_BAR_HEIGHT, node_y + node_h, node_id) )
     
     if not nodes_in_range:
         return []
     
     # Sort nodes by their top position
-    nodes_in_range.sort( key=lambda n: n['top'] )
+    nodes_in_range.sort( key=lambda n: n[0] )
     
     # Find gaps between consecutive nodes
     gaps = []
     min_gap_height = 20  # Minimum gap height to be usable (allows for reroute with some clearance)
     
     for i in range( len( nodes_in_range ) - 1 ):
-        upper_node = nodes_in_range[i]
-        lower_node = nodes_in_range[i + 1]
-        
-        gap_top = upper_node['bottom']
-        gap_bottom = lower_node['top']
+        _, gap_top, upper_id    = nodes_in_range[i]
+        gap_bottom, _, lower_id = nodes_in_range[i + 1]
         gap_height = gap_bottom - gap_top
         
         if gap_height >= min_gap_height:
@@ -1066,9 +1380,9 @@ def find_horizontal_gaps( nodes, origin_x, origin_y, target_x, target_y, origin_
             # Verify that a horizontal line at gap_y doesn't intersect ANY node in the range
             # (not just the two nodes defining the gap)
             path_is_clear = True
-            for node_bounds in nodes_in_range:
+            for node_top, node_bottom, _ in nodes_in_range:
                 # Check if this node's vertical bounds include gap_y
-                if node_bounds['top'] <= gap_y <= node_bounds['bottom']:
+                if node_top <= gap_y <= node_bottom:
                     # This node would be intersected by the horizontal path
                     path_is_clear = False
                     break
@@ -1084,7 +1398,7 @@ def find_horizontal_gaps( nodes, origin_x, origin_y, target_x, target_y, origin_
                 'y': gap_y,
                 'distance': distance,
                 'gap_height': gap_height,
-                'between_nodes': [upper_node['id'], lower_node['id']]
+                'between_nodes': [upper_id, lower_id]
             } )
     
     return gaps
@@ -1112,13 +1426,7 @@ def detect_link_overlaps( graph_data ):
     debug( f'✓ Analyzing {len( links )} links against {len( all_nodes )} total nodes' )
     
     # Filter to only workflow nodes (nodes that have connections)
-    connected_node_ids = set()
-    for link in links:
-        connected_node_ids.add( link['origin_id'] )
-        connected_node_ids.add( link['target_id'] )
-    
-    # Only process nodes that are connected via links
-    nodes = [node for node in all_nodes if node['id'] in connected_node_ids]
+    nodes, node_map = filter_workflow_nodes( all_nodes, links )
     
     excluded_count = len(all_nodes) - len(nodes)
     if excluded_count > 0:
@@ -1132,302 +1440,247 @@ def detect_link_overlaps( graph_data ):
             'overlaps': []
         }
     
-    # Build node map for quick lookup
-    node_map = {node['id']: node for node in nodes}
+    # Port anchors per node: output X (right edge), input X (left edge),
+    # Y of slot 0 for the overlap test, and Y of slot 0 for reroute distances
+    port_anchors = {}
+    for node in nodes:
+        bounds = get_node_bounds( node )
+        port_anchors[node['id']] = (bounds['right'], bounds['left'], bounds['top'] + NODE_TITLE_BAR_HEIGHT, node['pos'][1] + 30)
     
-    # Sort links by length (shortest first)
-    def calculate_link_length( link ):
-        '''Calculate Euclidean distance between link endpoints'''
-        if link['origin_id'] not in node_map or link['target_id'] not in node_map:
-            return float( 'inf' )  # Push invalid links to the end
+    # Link endpoints (treating links as straight lines for now), computed once
+    # for both the length sort and the overlap test
+    link_ends = []
+    for link in links:
+        origin_id = link['origin_id']
+        target_id = link['target_id']
         
-        origin_node = node_map[link['origin_id']]
-        target_node = node_map[link['target_id']]
+        if origin_id not in node_map or target_id not in node_map:
+            continue
         
-        # Get actual node bounds including title bars
-        origin_bounds = get_node_bounds( origin_node )
-        target_bounds = get_node_bounds( target_node )
+        # Port offsets below each node's slot 0, shared by both port anchors
+        origin_offset = link['origin_slot'] * 20
+        target_offset = link['target_slot'] * 20
         
-        origin_x = origin_bounds['right']
-        origin_y = origin_bounds['top'] + NODE_TITLE_BAR_HEIGHT + (link['origin_slot'] * 20)
+        # Origin point: output port on origin node (right side)
+        origin_x, _, origin_top, _ = port_anchors[origin_id]
+        origin_y = origin_top + origin_offset
         
-        target_x = target_bounds['left']
-        target_y = target_bounds['top'] + NODE_TITLE_BAR_HEIGHT + (link['target_slot'] * 20)
+        # Target point: input port on target node (left side)
+        _, target_x, target_top, _ = port_anchors[target_id]
+        target_y = target_top + target_offset
         
+        link_ends.append( (link, origin_x, origin_y, target_x, target_y, origin_offset, target_offset) )
+    
+    # Sort links by length (shortest first)
+    def calculate_link_length( ends ):
+        '''Calculate Euclidean distance between link endpoints'''
+        _, origin_x, origin_y, target_x, target_y, _, _ = ends
         dx = target_x - origin_x
         dy = target_y - origin_y
-        
         return (dx * dx + dy * dy) ** 0.5  # Euclidean distance
     
-    sorted_links = sorted( links, key=calculate_link_length )
+    link_ends.sort( key=calculate_link_length )
+    
+    # Node rectangles (body only, without title bar), built once for all links
+    node_rects   = [(node['pos'][0], node['pos'][1], node['size'][0], node['size'][1]) for node in nodes]
+    node_x_index = build_x_index( node_rects )
     
-    overlaps = []
+    # Node fields the range scans read, as parallel lists indexed like nodes
+    node_ids     = [node['id'] for node in nodes]
+    node_lefts   = [rect_x for rect_x, _, _, _ in node_rects]
+    node_rights  = [rect_x + rect_w for rect_x, _, rect_w, _ in node_rects]
+    node_tops    = [rect_y for _, rect_y, _, _ in node_rects]
+    node_bottoms = [rect_y + rect_h for _, rect_y, _, rect_h in node_rects]
+    
+    overlaps     = []
+    overlap_ends = []  # Per overlap: reroute endpoints, candidate nodes and columns, for Step 2
     
     # Check each link (now in order of length)
-    for link in sorted_links:
+    for link, origin_x, origin_y, target_x, target_y, origin_offset, target_offset in link_ends:
         origin_id = link['origin_id']
         target_id = link['target_id']
         
-        if origin_id not in node_map or target_id not in node_map:
-            continue
-        
-        origin_node = node_map[origin_id]
-        target_node = node_map[target_id]
-        
-        # Get actual node bounds including title bars
-        origin_bounds = get_node_bounds( origin_node )
-        target_bounds = get_node_bounds( target_node )
-        
-        # Get link endpoints (treating as straight line for now)
-        # Origin point: output port on origin node (right side)
-        origin_x = origin_bounds['right']
-        origin_y = origin_bounds['top'] + NODE_TITLE_BAR_HEIGHT + (link['origin_slot'] * 20)  # Port position
-        
-        # Target point: input port on target node (left side)
-        target_x = target_bounds['left']
-        target_y = target_bounds['top'] + NODE_TITLE_BAR_HEIGHT + (link['target_slot'] * 20)  # Port position
+        # Check if this link intersects any node (except origin and target)
+        # Only nodes horizontally between the origin and target are tested
+        overlapping_nodes = []
         
-        # Determine the horizontal range between origin and target
         min_x = min( origin_x, target_x )
         max_x = max( origin_x, target_x )
         
-        # Check if this link intersects any node (except origin and target)
-        # Only check nodes that are horizontally between the origin and target
-        overlapping_nodes = []
-        
-        for node in nodes:
+        candidates = query_x_index( node_x_index, min_x, max_x )
+        for i in line_segment_intersects_rects( origin_x, origin_y, target_x, target_y, node_rects, candidates ):
+            node    = nodes[i]
             node_id = node['id']
             
             # Skip the nodes this link connects to
             if node_id == origin_id or node_id == target_id:
                 continue
             
-            node_x     = node['pos'][0]
-            node_w     = node['size'][0]
-            node_right = node_x + node_w
+            overlapping_nodes.append( {
+                'node_id':   node_id,
+                'node_type': node['type'],
+                'node_pos':  [node['pos'][0], node['pos'][1]]
+            } )
+        
+        if overlapping_nodes:
+            # Find highest and lowest nodes in ALL columns the link passes through,
+            # and collect those columns' X positions, while this link's
+            # candidates are at hand (used by Step 2)
+            link_columns       = set()
+            highest_node_top   = None
+            lowest_node_bottom = None
+            highest_index      = None
+            lowest_index       = None
             
-            # Check if this node is horizontally between the origin and target
-            # Node must overlap with the horizontal span of the link
-            if node_right < min_x or node_x > max_x:
-                # Node is completely outside the horizontal range
-                continue
+            # Check all nodes in the horizontal range between origin and target
+            for i in candidates:
+                node_id = node_ids[i]
+                
+                # Skip the nodes this link connects to
+                if node_id == origin_id or node_id == target_id:
+                    continue
+                
+                # Check if this node is horizontally between the origin and target
+                # (candidates already have node_x <= max_x)
+                if node_rights[i] < min_x:
+                    continue
+                
+                # This node is in a column that the link passes through
+                link_columns.add( node_lefts[i] )
+                node_top    = node_tops[i]
+                node_bottom = node_bottoms[i]
+                
+                if highest_node_top is None or node_top < highest_node_top:
+                    highest_node_top = node_top
+                    highest_index    = i
+                
+                if lowest_node_bottom is None or node_bottom > lowest_node_bottom:
+                    lowest_node_bottom = node_bottom
+                    lowest_index       = i
             
-            node_y = node['pos'][1]
-            node_h = node['size'][1]
+            # Resolve the extreme nodes' ID and type once, after the scan
+            # (the overlapped nodes are in range, so both were found)
+            highest_node = nodes[highest_index]
+            lowest_node  = nodes[lowest_index]
             
-            # Check if link intersects this node
-            if line_segment_intersects_rect(
-                origin_x, origin_y,
-                target_x, target_y,
-                node_x, node_y,
-                node_w, node_h
-            ):
-                overlapping_nodes.append( {
-                    'node_id':   node_id,
-                    'node_type': node['type'],
-                    'node_pos':  [node_x, node_y]
-                } )
-        
-        if overlapping_nodes:
             overlap_info = {
-                'link_id':           link['id'],
-                'origin_id':         origin_id,
-                'origin_type':       origin_node['type'],
-                'target_id':         target_id,
-                'target_type':       target_node['type'],
-                'overlapping_nodes': overlapping_nodes
+                'link_id':            link['id'],
+                'origin_id':          origin_id,
+                'origin_type':        node_map[origin_id]['type'],
+                'target_id':          target_id,
+                'target_type':        node_map[target_id]['type'],
+                'overlapping_nodes':  overlapping_nodes,
+                'highest_node_top':   highest_node_top,
+                'highest_node_id':    highest_node['id'],
+                'highest_node_type':  highest_node['type'],
+                'lowest_node_bottom': lowest_node_bottom,
+                'lowest_node_id':     lowest_node['id'],
+                'lowest_node_type':   lowest_node['type']
             }
             overlaps.append( overlap_info )
+            
+            # Reroute distances are measured from ports 30 below the node's top
+            overlap_ends.append( (
+                origin_x, port_anchors[origin_id][3] + origin_offset,
+                target_x, port_anchors[target_id][3] + target_offset,
+                candidates, link_columns
+            ) )
     
     debug( f'\n✓ Found {len( overlaps )} links with overlaps:' )
     
-    # Track offsets and column usage for links going up or down
-    # Each entry: (offset_value, set_of_column_x_positions)
-    up_offsets = []  # List of (offset, column_set) tuples for upward links
-    down_offsets = []  # List of (offset, column_set) tuples for downward links
+    # Track the offset levels used in each column by links going up or down
+    # Level k routes base_offset + k * offset_increment past the extreme node
+    # Levels are stored as bitmasks (bit k set = level k used)
+    up_levels   = defaultdict( int )  # column X -> levels used by upward links
+    down_levels = defaultdict( int )  # column X -> levels used by downward links
     
     base_offset = 50
     offset_increment = 20
     
+    def lowest_free_level( column_levels, link_columns ):
+        '''Smallest offset level not used in any of the given columns'''
+        used = 0
+        for col_x in link_columns:
+            used |= column_levels.get( col_x, 0 )
+        # Lowest clear bit of used
+        return (~used & (used + 1)).bit_length() - 1
+    
     # Step 2: Determine reroute direction for each overlapping link
-    for overlap in overlaps:
+    for overlap, ends in zip( overlaps, overlap_ends ):
         origin_id = overlap['origin_id']
         target_id = overlap['target_id']
         
-        origin_node = node_map[origin_id]
-        target_node = node_map[target_id]
-        
-        # Get link endpoints
-        origin_x = origin_node['pos'][0] + origin_node['size'][0]
-        origin_y = origin_node['pos'][1] + 30 + (next( link['origin_slot'] for link in links if link['id'] == overlap['link_id'] ) * 20)
+        # Link endpoints, the nodes that may be between them and the column
+        # X positions the link passes through (from Step 1)
+        origin_x, origin_y, target_x, target_y, candidates, link_columns = ends
         
-        target_x = target_node['pos'][0]
-        target_y = target_node['pos'][1] + 30 + (next( link['target_slot'] for link in links if link['id'] == overlap['link_id'] ) * 20)
-        
-        # Determine the horizontal range between origin and target
-        min_x = min( origin_x, target_x)
-        max_x = max( origin_x, target_x )
-        
-        # Collect all column X positions this link passes through
-        link_columns = set()
-        for node in nodes:
-            node_id = node['id']
-            
-            # Skip the nodes this link connects to
-            if node_id == origin_id or node_id == target_id:
-                continue
-            
-            node_x = node['pos'][0]
-            node_w = node['size'][0]
-            node_right = node_x + node_w
-            
-            # Check if this node is horizontally between the origin and target
-            if node_right < min_x or node_x > max_x:
-                continue
-            
-            # Add this column position to the set
-            link_columns.add( node_x )
-        
-        # Find highest and lowest nodes in ALL columns the link passes through
-        highest_node_top   = None
-        lowest_node_bottom = None
-        highest_node_id    = None
-        highest_node_type  = None
-        lowest_node_id     = None
-        lowest_node_type   = None
-        
-        # Check all nodes in the horizontal range between origin and target
-        for node in nodes:
-            node_id = node['id']
-            
-            # Skip the nodes this link connects to
-            if node_id == origin_id or node_id == target_id:
-                continue
-            
-            node_x     = node['pos'][0]
-            node_w     = node['size'][0]
-            node_right = node_x + node_w
-            
-            # Check if this node is horizontally between the origin and target
-            if node_right < min_x or node_x > max_x:
-                continue
-            
-            # This node is in a column that the link passes through
-            node_top    = node['pos'][1]
-            node_bottom = node['pos'][1] + node['size'][1]
-            
-            if highest_node_top is None or node_top < highest_node_top:
-                highest_node_top  = node_top
-                highest_node_id   = node_id
-                highest_node_type = node['type']
-            
-            if lowest_node_bottom is None or node_bottom > lowest_node_bottom:
-                lowest_node_bottom = node_bottom
-                lowest_node_id     = node_id
-                lowest_node_type   = node['type']
+        highest_node_top   = overlap['highest_node_top']
+        lowest_node_bottom = overlap['lowest_node_bottom']
         
         # Calculate total vertical travel distance for routing above or below
         # We need to check what the actual reroute Y position would be with each offset option
         # and calculate the total distance from both endpoints
         
         # For routing UP: find smallest available offset
-        potential_up_offset = None
-        for offset_value, used_columns in up_offsets:
-            if not link_columns.intersection( used_columns ):
-                potential_up_offset = offset_value
-                break
-        if potential_up_offset is None:
-            potential_up_offset = base_offset + (len( up_offsets ) * offset_increment)
+        up_level = lowest_free_level( up_levels, link_columns )
+        potential_up_offset = base_offset + up_level * offset_increment
         
         potential_up_y = highest_node_top - potential_up_offset
         up_distance = abs( origin_y - potential_up_y ) + abs( target_y - potential_up_y )
         
         # For routing DOWN: find smallest available offset
-        potential_down_offset = None
-        for offset_value, used_columns in down_offsets:
-            if not link_columns.intersection( used_columns ):
-                potential_down_offset = offset_value
-                break
-        if potential_down_offset is None:
-            potential_down_offset = base_offset + (len( down_offsets ) * offset_increment)
+        down_level = lowest_free_level( down_levels, link_columns )
+        potential_down_offset = base_offset + down_level * offset_increment
         
         potential_down_y = lowest_node_bottom + potential_down_offset
         down_distance = abs( origin_y - potential_down_y ) + abs( target_y - potential_down_y )
         
         # Check for horizontal gaps between nodes
         horizontal_gaps = find_horizontal_gaps( 
-            nodes, origin_x, origin_y, target_x, target_y, origin_id, target_id 
+            nodes, origin_x, origin_y, target_x, target_y, origin_id, target_id, candidates
         )
         
         # Find the best routing option (up, down, or through a gap)
-        best_option = 'up' if up_distance < down_distance else 'down'
-        best_distance = min( up_distance, down_distance )
-        best_y = potential_up_y if best_option == 'up' else potential_down_y
-        best_offset = potential_up_offset if best_option == 'up' else potential_down_offset
+        if up_distance < down_distance:
+            best_option   = 'up'
+            best_distance = up_distance
+            best_y        = potential_up_y
+            best_level    = up_level
+        else:
+            best_option   = 'down'
+            best_distance = down_distance
+            best_y        = potential_down_y
+            best_level    = down_level
         
-        debug( f'    Comparing routing options for link {overlap["link_id"]}:', 2 )
-        debug( f'      Up: distance={up_distance:.1f}, y={potential_up_y:.1f}', 2 )
-        debug( f'      Down: distance={down_distance:.1f}, y={potential_down_y:.1f}', 2 )
+        if debug.level >= 2:
+            debug( f'    Comparing routing options for link {overlap["link_id"]}:', 2 )
+            debug( f'      Up: distance={up_distance:.1f}, y={potential_up_y:.1f}', 2 )
+            debug( f'      Down: distance={down_distance:.1f}, y={potential_down_y:.1f}', 2 )
         
         # Check if any gap offers a shorter path
         for gap in horizontal_gaps:
-            debug( f'      Gap: distance={gap["distance"]:.1f}, y={gap["y"]:.1f}, height={gap["gap_height"]:.1f}', 2 )
+            if debug.level >= 2:
+                debug( f'      Gap: distance={gap["distance"]:.1f}, y={gap["y"]:.1f}, height={gap["gap_height"]:.1f}', 2 )
             if gap['distance'] < best_distance:
                 best_option = 'gap'
                 best_distance = gap['distance']
                 best_y = gap['y']
-                best_offset = None  # Gaps don't use offset tracking
+                best_level = None  # Gaps don't use offset tracking
                 gap['selected'] = True  # Mark this gap as chosen
         
-        debug( f'      → Selected: {best_option.upper()} with distance={best_distance:.1f}', 2 )
+        if debug.level >= 2:
+            debug( f'      → Selected: {best_option.upper()} with distance={best_distance:.1f}', 2 )
         
         # Determine which path requires less total vertical movement
-        if best_option == 'up':
-            reroute_direction = 'up'
-            
-            # Use the offset we already calculated
-            chosen_offset = best_offset
-            
-            # Find or create the offset level
-            offset_found = False
-            for offset_value, used_columns in up_offsets:
-                if offset_value == chosen_offset:
-                    # Add this link's columns to this offset level
-                    used_columns.update( link_columns )
-                    offset_found = True
-                    break
-            
-            if not offset_found:
-                # Create new offset level
-                up_offsets.append( (chosen_offset, link_columns.copy()) )
-            
-            reroute_y = best_y
-
-        elif best_option == 'down':
-            reroute_direction = 'down'
-            
-            # Use the offset we already calculated
-            chosen_offset = best_offset
-            
-            # Find or create the offset level
-            offset_found = False
-            for offset_value, used_columns in down_offsets:
-                if offset_value == chosen_offset:
-                    # Add this link's columns to this offset level
-                    used_columns.update( link_columns )
-                    offset_found = True
-                    break
-            
-            if not offset_found:
-                # Create new offset level
-                down_offsets.append( (chosen_offset, link_columns.copy()) )
-            
-            reroute_y = best_y
+        reroute_direction = best_option
+        reroute_y         = best_y
         
-        else:  # best_option == 'gap'
-            reroute_direction = 'gap'
-            reroute_y = best_y
-            chosen_offset = None  # Gaps don't use offsets
+        if best_option != 'gap':  # Gaps don't use offsets
+            levels = up_levels if best_option == 'up' else down_levels
+            
+            # Claim the offset level we already calculated in this link's columns
+            for col_x in link_columns:
+                levels[col_x] |= 1 << best_level
         
         # Calculate horizontal positions for reroutes
         # First reroute: at the start of the first column after the starting node
@@ -1444,45 +1697,43 @@ def detect_link_overlaps( graph_data ):
         overlap['reroute_direction'] = reroute_direction
         overlap['up_distance']       = up_distance
         overlap['down_distance']     = down_distance
-        overlap['highest_node_top']  = highest_node_top
-        overlap['highest_node_id']   = highest_node_id
 
-        debug( f'    → Reroute 1 position: {reroute1_pos}', 2 )
-        debug( f'    → Reroute 2 position: {reroute2_pos}', 2 )
+        if debug.level >= 2:
+            debug( f'    → Reroute 1 position: {reroute1_pos}', 2 )
+            debug( f'    → Reroute 2 position: {reroute2_pos}', 2 )
 
-        overlap['highest_node_type']  = highest_node_type
-        overlap['lowest_node_bottom'] = lowest_node_bottom
-        overlap['lowest_node_id']     = lowest_node_id
-        overlap['lowest_node_type']   = lowest_node_type
-        overlap['reroute1_pos']       = reroute1_pos
-        overlap['reroute2_pos']       = reroute2_pos
-        overlap['reroute_y']          = reroute_y
+        overlap['reroute1_pos']      = reroute1_pos
+        overlap['reroute2_pos']      = reroute2_pos
+        overlap['reroute_y']         = reroute_y
         
         # Print results
-        debug( f'\n  Link {overlap["link_id"]}: {overlap["origin_type"]}({overlap["origin_id"]}) -> {overlap["target_type"]}({overlap["target_id"]})', 2 )
-        debug( f'    Overlaps {len(overlap["overlapping_nodes"])} node(s):', 2 )
+        if debug.level >= 2:
+            debug( f'\n  Link {overlap["link_id"]}: {overlap["origin_type"]}({overlap["origin_id"]}) -> {overlap["target_type"]}({overlap["target_id"]})', 2 )
+            debug( f'    Overlaps {len(overlap["overlapping_nodes"])} node(s):', 2 )
 
-        for node_info in overlap['overlapping_nodes']:
-            debug( f'      - {node_info["node_type"]}({node_info["node_id"]}) at {node_info["node_pos"]}', 2 )
-        debug( f'    Highest node: {highest_node_type}({highest_node_id}) top at Y={highest_node_top}', 2 )
-        debug( f'    Lowest node: {lowest_node_type}({lowest_node_id}) bottom at Y={lowest_node_bottom}', 2 )
-        debug( f'    Combined distance to top: {up_distance:.1f}', 2 )
-        debug( f'    Combined distance to bottom: {down_distance:.1f}', 2 )
-        if horizontal_gaps:
-            debug( f'    Found {len(horizontal_gaps)} horizontal gap(s):', 2 )
-            for gap in horizontal_gaps:
-                if gap.get('selected'):
-                    debug( f'      - Gap at Y={gap["y"]:.1f}, distance={gap["distance"]:.1f} ← SELECTED', 2 )
-                else:
-                    debug( f'      - Gap at Y={gap["y"]:.1f}, distance={gap["distance"]:.1f}', 2 )
-        debug( f'    → Reroute link {overlap["link_id"]} {reroute_direction.upper()}', 2 )
-    
-    debug( '\n' + '-'*50, 2 )
-    debug( 'Reroute Summary:', 2 )
-    for overlap in overlaps:
-        debug( f'  Reroute link {overlap["link_id"]} {overlap["reroute_direction"]}', 2 )
-    
-    debug( '\n' + '='*50, 2 )
+            for node_info in overlap['overlapping_nodes']:
+                debug( f'      - {node_info["node_type"]}({node_info["node_id"]}) at {node_info["node_pos"]}', 2 )
+            debug( f'    Highest node: {overlap["highest_node_type"]}({overlap["highest_node_id"]}) top at Y={highest_node_top}', 2 )
+            debug( f'    Lowest node: {overlap["lowest_node_type"]}({overlap["lowest_node_id"]}) bottom at Y={lowest_node_bottom}', 2 )
+            debug( f'    Combined distance to top: {up_distance:.1f}', 2 )
+            debug( f'    Combined distance to bottom: {down_distance:.1f}', 2 )
+            if horizontal_gaps:
+                debug( f'    Found {len(horizontal_gaps)} horizontal gap(s):', 2 )
+                for gap in horizontal_gaps:
+                    if gap.get('selected'):
+                        debug( f'      - Gap at Y={gap["y"]:.1f}, distance={gap["distance"]:.1f} ← SELECTED', 2 )
+                    else:
+                        debug( f'      - Gap at Y={gap["y"]:.1f}, distance={gap["distance"]:.1f}', 2 )
+            debug( f'    → Reroute link {overlap["link_id"]} {reroute_direction.upper()}', 2 )
+    
+    # Summary (nothing to list on already-clean workflows)
+    if overlaps and debug.level >= 2:
+        debug( '\n' + '-'*50, 2 )
+        debug( 'Reroute Summary:', 2 )
+        for overlap in overlaps:
+            debug( f'  Reroute link {overlap["link_id"]} {overlap["reroute_direction"]}', 2 )
+        
+        debug( '\n' + '='*50, 2 )
     debug( '' )
     
     return {
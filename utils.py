@@ -6,11 +6,22 @@ def set_debug( debug_level ):
         debug_level: The debug level threshold (0 = no debug output, higher = more verbose)
     
     Returns:
-        A debug function that takes (message, lvl=1) and prints conditionally
+        A debug function that takes (message, lvl=1) and prints conditionally.
+        Its `level` attribute holds the threshold, so callers can skip
+        building messages that would not be printed:
+        
+            if debug.level >= 2:
+                debug( f'...', 2 )
     '''
 
-    def debug( message, lvl=1 ):
-        if debug_level >= lvl:
-            print( message )
+    if debug_level <= 0:
+        # Output is off - nothing to check per call
+        def debug( message, lvl=1 ):
+            pass
+    else:
+        def debug( message, lvl=1 ):
+            if debug_level >= lvl:
+                print( message )
     
+    debug.level = debug_level
     return debug